@@ -17,6 +17,10 @@ from modules import *
 from utils import *
 
 
+# plotting style, set once at import
+plt.style.use('ggplot')
+plt.rcParams['axes.prop_cycle'] = cycler('color', ['blue', 'red', 'black', 'green', 'brown', 'orangered', 'purple'])
+
 
 class ContraDC():
     """
@@ -86,6 +90,10 @@ class ContraDC():
     :param w_chirp_step: Chirp step of the waveguide widths [m].
     :type w_chirp_step: float
 
+    :param use_gpu: Either to propagate on the GPU, using CuPy. Worthwhile for large
+        resolution*N_seg. Falls back to the CPU (with a warning) if CuPy is not installed.
+    :type use_gpu: bool, default=False
+
     :return: ContraDC object, not yet simulated.
 
     **Class Attributes**: Are calculated by the different member functions during simulation.
@@ -105,7 +113,7 @@ class ContraDC():
     def __init__(self, N=1000, period=322e-9, polyfit_file=None, a=10, apod_shape="gaussian",
         kappa=48000, T=300, resolution=500, N_seg=100, wvl_range=[1530e-9,1580e-9],
         central_wvl=1550e-9, alpha=10, w1=.56e-6, w2=.44e-6,
-        w_chirp_step=1e-9, period_chirp_step=2e-9):
+        w_chirp_step=1e-9, period_chirp_step=2e-9, use_gpu=False):
 
         # Class attributes
         self.N           =  N           
@@ -125,6 +133,10 @@ class ContraDC():
         self.period_chirp_step = period_chirp_step # To comply with GDS resolution
         self.w_chirp_step = w_chirp_step
 
+        if use_gpu and not cupy_available:
+            warnings.warn("CuPy is not installed, propagating on the CPU.")
+        self.use_gpu = use_gpu and cupy_available
+
         # Constants
         self._antiRefCoeff = 0.01
         
@@ -136,6 +148,10 @@ class ContraDC():
         self.w2_profile = None
         self.T_profile = None
 
+        # Figure of displayResults(), reused across calls
+        self._fig = None
+        self._artists = {}
+
         # Useful flag
         self.is_simulated = False
 
@@ -144,7 +160,13 @@ class ContraDC():
     # return properties in user-friendly units
     @property
     def _wavelength(self):
-        return self.wavelength*1e9
+        # cached, since it is used by every plot; recomputed whenever
+        # wvl_range or resolution change
+        key = (tuple(self.wvl_range), self.resolution)
+        if getattr(self, "_wavelength_key", None) != key:
+            self._wavelength_nm = self.wavelength*1e9
+            self._wavelength_key = key
+        return self._wavelength_nm
 
     @property
     def _period(self):
@@ -216,20 +238,13 @@ class ContraDC():
         neffThermal = dneffdT*(self.T_profile - T0)
 
         if self.polyfit_file is None:
-            # Import simulation results to be used for interpolation
-            n1 = np.reshape(np.loadtxt(r"./Database/neff/neff_1.txt"),(5,5,5))
-            n2 = np.reshape(np.loadtxt(r"./Database/neff/neff_2.txt"),(5,5,5))
-            w1_w2_wvl = np.loadtxt(r"./Database/neff/w1_w2_lambda.txt")
+            n1, n2 = interpolate_neff(self.w1_profile, self.w2_profile, self.wavelength)
 
-            w1_tiled = np.tile(self.w1_profile, (self.resolution,1))
-            w2_tiled = np.tile(self.w2_profile, (self.resolution,1))
-            wavelength_tiled = np.transpose(np.tile(self.wavelength, (self.N_seg,1)))
-            d = np.transpose(np.stack((w1_tiled, w2_tiled, wavelength_tiled)), (1,2,0))
+            self.n1_profile = neffThermal[None,:] + n1
+            self.n2_profile = neffThermal[None,:] + n2
 
-            self.n1_profile = neffThermal + scipy.interpolate.interpn(w1_w2_wvl, n1, d)
-            self.n2_profile = neffThermal + scipy.interpolate.interpn(w1_w2_wvl, n2, d)
-            self.beta1_profile = 2*math.pi / wavelength_tiled * self.n1_profile
-            self.beta2_profile = 2*math.pi / wavelength_tiled * self.n2_profile
+            self.beta1_profile = (2*math.pi / self.wavelength)[:,None] * self.n1_profile
+            self.beta2_profile = (2*math.pi / self.wavelength)[:,None] * self.n2_profile
 
         else:
             # polyfit of the type n1 = a1*wvl + b1, n2 = a2*wvl + b2
@@ -239,16 +254,46 @@ class ContraDC():
 
 
                 self.wvl_range = [float(wvl1), float(wvl2)]
-                wavelength_tiled = np.transpose(np.tile(self.wavelength, (self.N_seg,1)))
+                wavelength = self.wavelength[:,None]
 
-                self.n1_profile = neffThermal + float(a1)*wavelength_tiled + float(b1)
-                self.n2_profile = neffThermal + float(a2)*wavelength_tiled + float(b2)
-                self.beta1_profile = 2*math.pi / wavelength_tiled * self.n1_profile
-                self.beta2_profile = 2*math.pi / wavelength_tiled * self.n2_profile
+                self.n1_profile = neffThermal[None,:] + float(a1)*wavelength + float(b1)
+                self.n2_profile = neffThermal[None,:] + float(a2)*wavelength + float(b2)
+                self.beta1_profile = 2*math.pi / wavelength * self.n1_profile
+                self.beta2_profile = 2*math.pi / wavelength * self.n2_profile
 
         return self         
 
 
+    def _gaussianApod(self):
+        """Gaussian apodization profile, of gaussian constant self.a."""
+
+        if self.a == 0:
+            return self.kappa*np.ones(self.N_seg)
+
+        z = np.arange(0,self.N_seg)
+        apod = np.exp(-self.a*(z - self.N_seg/2)**2 /self.N_seg**2)
+        apod -= apod.min()
+        apod *= self.kappa/apod.max()
+
+        return apod
+
+
+    def _tanhApod(self):
+        """Hyperbolic-tangent-shaped apodization profile."""
+
+        z = np.arange(0, self.N_seg)
+        alpha, beta = 2, 3
+        apod = 1/2 * (1 + np.tanh(beta*(1-2*abs(2*z/self.N_seg)**alpha)))
+        apod = np.append(np.flip(apod[0:int(apod.size/2)]), apod[0:int(apod.size/2)])
+        apod *= self.kappa
+
+        return apod
+
+
+    # apodization profile builders, by apod_shape
+    _APOD_BUILDERS = {"gaussian": _gaussianApod, "tanh": _tanhApod}
+
+
     def getApodProfile(self):
         """Calculates the apodization profile, based on the apod_profile 
             (either "gaussian" of "tanh").
@@ -256,27 +301,21 @@ class ContraDC():
         :return: ContraDC object with calculated apodization profile (self.apod_profile).
         """
 
-        z = np.arange(0,self.N_seg)
-
-        if self.apod_shape is "gaussian":
-            if self.a == 0:
-                apod = self.kappa*np.ones(self.N_seg)
-            else:
-                apod = np.exp(-self.a*(z - self.N_seg/2)**2 /self.N_seg**2)
-                apod = (apod - min(apod))/(max(apod) - min(apod))
-                apod *= self.kappa
-
-        elif self.apod_shape is "tanh":
-            z = np.arange(0, self.N_seg)
-            alpha, beta = 2, 3
-            apod = 1/2 * (1 + np.tanh(beta*(1-2*abs(2*z/self.N_seg)**alpha)))
-            apod = np.append(np.flip(apod[0:int(apod.size/2)]), apod[0:int(apod.size/2)])
-            apod *= self.kappa
-
-        self.apod_profile = apod
+        self.apod_profile = self._APOD_BUILDERS[self.apod_shape](self)
         return self
 
 
+    def _snapLinear(self, start, stop, step):
+        """ Linear profile from start to stop along the N_seg segments,
+        snapped to the absolute grid of the given step.
+        """
+
+        profile = np.linspace(start, stop, self.N_seg)
+        profile = np.round(profile/step)*step
+
+        return np.round(profile, 15)
+
+
     def getChirpProfile(self):
         """ Creates linear chirp profiles along the CDC device.
         Chirp is specified by assigning 2-element lists to the constructor
@@ -296,16 +335,12 @@ class ContraDC():
             if self.w1_profile is None:
                 if isinstance(self.w1, float):
                     self.w1 = [self.w1] # convert to list
-                self.w1_profile = np.linspace(self.w1[0],self.w1[-1],self.N_seg)
-                self.w1_profile = np.round(self.w1_profile/self.w_chirp_step)*self.w_chirp_step
-                self.w1_profile = np.round(self.w1_profile, 15)
+                self.w1_profile = self._snapLinear(self.w1[0], self.w1[-1], self.w_chirp_step)
 
             if self.w2_profile is None:
                 if isinstance(self.w2, float):
                     self.w2 = [self.w2] # convert to list
-                self.w2_profile = np.linspace(self.w2[0],self.w2[-1],self.N_seg)
-                self.w2_profile = np.round(self.w2_profile/self.w_chirp_step)*self.w_chirp_step
-                self.w2_profile = np.round(self.w2_profile, 15)
+                self.w2_profile = self._snapLinear(self.w2[0], self.w2[-1], self.w_chirp_step)
 
         # period chirp
         if self.period_profile is None:
@@ -324,20 +359,46 @@ class ContraDC():
         return self
 
 
-    def makeRightShape(self, param):
-        """ Simply adds dimensionality to the parameters in sights of 
-        matrix operations in the "propagate" method The correct shape is
-        (self.resolution, self.N_seg ,4, 4).
+    def fetchParams(self, wvl):
+        """ Fetches the period and waveguide widths reflecting the targeted wavelength(s),
+        from the SOI database (Database/Target_wavelengths.txt). Each wavelength is matched
+        to the closest database entry, and wavelengths outside of the database are
+        matched to its edges.
 
-        :param param: Any ContraDC parameter.
+        :param wvl: Targeted reflection wavelength(s) [m].
+        :type wvl: float or np array
 
-        :return: The given parameter, with the right dimensionality.
+        :return: period, w1 and w2 [m], with the same shape as wvl.
         """
 
-        param = np.expand_dims(param, (0))
-        param = np.tile(param, (self.resolution,1))
+        wavelength, period, w1, w2 = target_wavelengths()
 
-        return param
+        wvl = np.asarray(wvl)
+        idx = np.clip(np.searchsorted(wavelength, wvl), 1, wavelength.size - 1)
+        idx -= (wvl - wavelength[idx-1]) < (wavelength[idx] - wvl)
+
+        return period[idx], w1[idx], w2[idx]
+
+
+    def optimizeChirp(self, start_wvl, end_wvl):
+        """ Creates the period and waveguide width chirp profiles that linearly scan
+        the reflection wavelength along the device, from start_wvl to end_wvl. 
+        All segments are looked up at once in the SOI database through fetchParams().
+
+        :param start_wvl: Reflection wavelength of the first segment [m].
+        :type start_wvl: float
+
+        :param end_wvl: Reflection wavelength of the last segment [m].
+        :type end_wvl: float
+
+        :return: ContraDC object with calculated chirp profiles (self.period_profile, 
+            self.w1_profile, self.w2_profile).
+        """
+
+        ref_wvl = np.linspace(start_wvl, end_wvl, self.N_seg)
+        self.period_profile, self.w1_profile, self.w2_profile = self.fetchParams(ref_wvl)
+
+        return self
 
 
     def propagate(self):
@@ -346,68 +407,76 @@ class ContraDC():
             matrix and extract the thru and drop electric field responses.
 
         :return: ContraDC object with computed values for self.thru, self.drop, self.E_thru,
-            self.E_drop, self.transferMatrix.
+            self.E_drop, self.transfer_matrix. The left-right transfer matrix is stored
+            wavelength-first, with shape (resolution, 4, 4).
         """
 
         mode_kappa_a1, mode_kappa_b2 = 1, 1
         mode_kappa_a2, mode_kappa_b1 = 0, 0
+        mode_a = np.array([mode_kappa_a1, mode_kappa_a2])
+        mode_b = np.array([mode_kappa_b1, mode_kappa_b2])
 
         alpha_e = 100*self.alpha/10*np.log10(10)
-        alpha_e = self.makeRightShape(alpha_e)
 
+        # the numba kernel does no bounds checking, so mismatched profiles are caught here
+        shapes = {"apod_profile": (self.N_seg,), "period_profile": (self.N_seg,),
+                  "beta1_profile": (self.resolution, self.N_seg), "beta2_profile": (self.resolution, self.N_seg)}
+        for name, shape in shapes.items():
+            if np.shape(getattr(self, name)) != shape:
+                raise ValueError("%s has shape %s, expected %s." % (name, np.shape(getattr(self, name)), shape))
+
+        # segment-wise quantities, shared by all wavelengths
         l_seg = self.N/self.N_seg * self.period_profile   
         l_cum = np.cumsum(l_seg)
         l_cum -= l_cum[0]
+        detuning = np.pi/self.period_profile + 1j*alpha_e
 
-        l_seg = self.makeRightShape(l_seg)
-        l_cum = self.makeRightShape(l_cum)
-
-        kappa_12 = self.makeRightShape(self.apod_profile)
-        kappa_21 = self.makeRightShape(np.conj(kappa_12))
-        kappa_11 = self.makeRightShape(self._antiRefCoeff * self.apod_profile)
-        kappa_22 = self.makeRightShape(self._antiRefCoeff * self.apod_profile)
-
-        beta_del_1 = self.beta1_profile - np.pi/self.period_profile  - 1j*alpha_e
-        beta_del_2 = self.beta2_profile - np.pi/self.period_profile  - 1j*alpha_e
+        beta_del_1 = self.beta1_profile - detuning
+        beta_del_2 = self.beta2_profile - detuning
 
-        S1 = np.zeros((self.resolution,self.N_seg,4,4), dtype=complex)
-        S2 = np.zeros((self.resolution,self.N_seg,4,4), dtype=complex)
+        if numba_available and not self.use_gpu:
+            P = propagate_kernel(np.ascontiguousarray(beta_del_1, dtype=complex),
+                                 np.ascontiguousarray(beta_del_2, dtype=complex),
+                                 np.ascontiguousarray(self.apod_profile, dtype=complex),
+                                 float(self._antiRefCoeff),
+                                 np.ascontiguousarray(l_seg, dtype=float),
+                                 np.ascontiguousarray(l_cum, dtype=float))
 
-        S1[:,:,0,0] = 1j*beta_del_1
-        S1[:,:,1,1] = 1j*beta_del_2
-        S1[:,:,2,2] = -1j*beta_del_1
-        S1[:,:,3,3] = -1j*beta_del_2
-
-        S2[:,:,0,0] = -1j*beta_del_1
-        S2[:,:,1,0] = 0
-        S2[:,:,2,0] = 1j*np.conj(kappa_11)*np.exp(-1j*2*beta_del_1*l_cum)
-        S2[:,:,3,0] = 1j*np.conj(kappa_12)*np.exp(-1j*(beta_del_1+beta_del_2)*l_cum)
+        else:
+            apod_profile = self.apod_profile
+            if self.use_gpu:
+                beta_del_1, beta_del_2, l_seg, l_cum, apod_profile = map(cp.asarray,
+                    (beta_del_1, beta_del_2, l_seg, l_cum, apod_profile))
 
-        S2[:,:,0,1] = 0
-        S2[:,:,1,1] = -1j*beta_del_2
-        S2[:,:,2,1] = 1j*np.conj(kappa_12)*np.exp(-1j*(beta_del_1+beta_del_2)*l_cum)
-        S2[:,:,3,1] = 1j*np.conj(kappa_22)*np.exp(-1j*2*beta_del_2*l_cum)
+            # (N_seg) profiles broadcast against the (resolution, N_seg) propagation constants
+            kappa_12 = apod_profile
+            kappa_11 = self._antiRefCoeff * apod_profile
+            kappa_22 = kappa_11
 
-        S2[:,:,0,2] = -1j*kappa_11*np.exp(1j*2*beta_del_1*l_cum)
-        S2[:,:,1,2] = -1j*kappa_12*np.exp(1j*(beta_del_1+beta_del_2)*l_cum)
-        S2[:,:,2,2] = 1j*beta_del_1
-        S2[:,:,3,2] = 0
+            # phase terms, each computed once
+            phase_11 = np.exp(1j*2*beta_del_1*l_cum)
+            phase_12 = np.exp(1j*(beta_del_1+beta_del_2)*l_cum)
+            phase_22 = np.exp(1j*2*beta_del_2*l_cum)
 
-        S2[:,:,0,3] = -1j*kappa_12*np.exp(1j*(beta_del_1+beta_del_2)*l_cum)
-        S2[:,:,1,3] = -1j*kappa_22*np.exp(1j*2*beta_del_2*l_cum)
-        S2[:,:,2,3] = 0
-        S2[:,:,3,3] = 1j*beta_del_2
+            # coupling blocks, the propagation phases being factored in
+            U = np.empty_like(beta_del_1, shape=(self.resolution,self.N_seg,2,2), dtype=complex)
+            L = np.empty_like(beta_del_1, shape=(self.resolution,self.N_seg,2,2), dtype=complex)
 
-        l_seg = np.expand_dims(l_seg, (2,3))
-        l_seg = np.tile(l_seg, (1,1,4,4))
+            U[:,:,0,0] = -1j*kappa_11*phase_11
+            U[:,:,0,1] = -1j*kappa_12*phase_12
+            U[:,:,1,0] = U[:,:,0,1]
+            U[:,:,1,1] = -1j*kappa_22*phase_22
 
+            L[:,:,0,0] = 1j*np.conj(kappa_11)/phase_11
+            L[:,:,0,1] = 1j*np.conj(kappa_12)/phase_12
+            L[:,:,1,0] = L[:,:,0,1]
+            L[:,:,1,1] = 1j*np.conj(kappa_22)/phase_22
 
-        # M contains EVERYTHING
-        M = expm(l_seg*(S1 + S2))
+            # M contains EVERYTHING
+            M = expm_coupled(U, L, l_seg)
 
-        # propagate the sucker
-        for n in range(self.N_seg):
-            P = M[:,n,:,:] if n == 0 else np.matmul(M[:,n,:,:],P)
+            # propagate the sucker
+            P = cascade(M)
 
         # left-right transfer matrix
         left_right = P 
@@ -415,14 +484,14 @@ class ContraDC():
         # in-out transfer matrix
         in_out = switchTop(left_right) 
 
-        T = in_out[:,0,0]*mode_kappa_a1 + in_out[:,0,1]*mode_kappa_a2
-        R = in_out[:,3,0]*mode_kappa_a1 + in_out[:,3,1]*mode_kappa_a2
+        if self.use_gpu:
+            left_right, in_out = cp.asnumpy(left_right), cp.asnumpy(in_out)
 
-        T_co = in_out[:,1,0]*mode_kappa_a1 + in_out[:,1,0]*mode_kappa_a2
-        R_co = in_out[:,2,0]*mode_kappa_a1 + in_out[:,2,1]*mode_kappa_a2
+        # all four outputs for the input modes at once: T, T_co, R_co, R
+        T, T_co, R_co, R = np.transpose(in_out[:,:,:2] @ mode_a)
 
-        self.E_thru = mode_kappa_a1*T + mode_kappa_a2*T_co
-        self.E_drop = mode_kappa_b1*R_co + mode_kappa_b2*R
+        self.E_thru = mode_a @ np.stack((T, T_co))
+        self.E_drop = mode_b @ np.stack((R_co, R))
 
         # return results        
         self.thru = 10*np.log10(np.abs(self.E_thru)**2).squeeze()
@@ -523,8 +592,7 @@ class ContraDC():
             frequency = self.c/self.wavelength
             omega = 2*np.pi*frequency
 
-            group_delay = -np.diff(drop_phase)/np.diff(omega)
-            self.group_delay = np.append(group_delay, group_delay[-1])
+            self.group_delay = -np.gradient(np.squeeze(drop_phase), omega)
 
             return self
 
@@ -589,10 +657,20 @@ class ContraDC():
 
         self.getPerformance()
 
-        fig = plt.figure(figsize=(9,6))
-
-        plt.style.use('ggplot')
-        plt.rcParams['axes.prop_cycle'] = cycler('color', ['blue', 'red', 'black', 'green', 'brown', 'orangered', 'purple'])
+        # during design sweeps, update the figure of the previous call in place
+        # (the segment ticks depend on N_seg, so it is part of the layout)
+        layout = (self.polyfit_file is None, self.N_seg, tag_url)
+        if self._fig is not None and plt.fignum_exists(self._fig.number):
+            if self._fig_layout == layout:
+                self._updateResults()
+                self._fig.canvas.draw_idle()
+                plt.show()
+                return self
+            plt.close(self._fig)
+
+        self._fig = plt.figure(figsize=(9,6))
+        self._fig_layout = layout
+        artists = self._artists = {}
 
         profile_ticks = np.round(np.linspace(0, self.N_seg, 4))
         text_color = np.asarray([0,0,0]) + .25
@@ -601,47 +679,47 @@ class ContraDC():
 
         plt.subplot(grid[0:2,0])
         plt.title("Grating Profiles", color=text_color)
-        plt.plot(range(self.N_seg), self._apod_profile)
+        artists["apod"], = plt.plot(range(self.N_seg), self._apod_profile)
         plt.xticks(profile_ticks, size=0)
         plt.yticks(color=text_color)
         plt.ylabel("$\kappa$ (/mm)", color=text_color)
-        plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+        plt.grid(True, color='w', linestyle='-', linewidth=1.5)
         plt.tick_params(axis=u'both', which=u'both',length=0)
 
         plt.subplot(grid[2,0])
-        plt.plot(range(self.N_seg), self._period_profile)
+        artists["period"], = plt.plot(range(self.N_seg), self._period_profile)
         plt.xticks(profile_ticks, size=0)
         plt.yticks(color=text_color)
         plt.ylabel("$\Lambda$ (nm)", color=text_color)
-        plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+        plt.grid(True, color='w', linestyle='-', linewidth=1.5)
         plt.tick_params(axis=u'both', which=u'both',length=0)
 
         
 
         if self.polyfit_file is None:
             plt.subplot(grid[4,0])
-            plt.plot(range(self.N_seg), self._w2_profile, label="wg 2")
+            artists["w2"], = plt.plot(range(self.N_seg), self._w2_profile, label="wg 2")
             plt.ylabel("w2 (nm)", color=text_color)
             plt.xticks(profile_ticks, size=0, color=text_color)
             plt.yticks(color=text_color)
-            plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+            plt.grid(True, color='w', linestyle='-', linewidth=1.5)
             plt.tick_params(axis=u'both', which=u'both',length=0)
 
             plt.subplot(grid[5,0])
-            plt.plot(range(self.N_seg), self._w1_profile, label="wg 1")
+            artists["w1"], = plt.plot(range(self.N_seg), self._w1_profile, label="wg 1")
             plt.xlabel("Segment", color=text_color)
             plt.ylabel("w1 (nm)", color=text_color)
             plt.xticks(profile_ticks, color=text_color)
             plt.yticks(color = text_color)
-            plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+            plt.grid(True, color='w', linestyle='-', linewidth=1.5)
             plt.tick_params(axis=u'both', which=u'both',length=0)
 
             plt.subplot(grid[3,0])
-            plt.plot(range(self.N_seg), self.T_profile)
+            artists["T"], = plt.plot(range(self.N_seg), self.T_profile)
             plt.xticks(profile_ticks, size=0)
             plt.yticks(color=text_color)
             plt.ylabel("T (K)", color=text_color)
-            plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+            plt.grid(True, color='w', linestyle='-', linewidth=1.5)
             plt.tick_params(axis=u'both', which=u'both',length=0)
 
 
@@ -649,12 +727,8 @@ class ContraDC():
         plt.title("Specifications", color=text_color)
         numElems = 6
         plt.axis([0,1,-numElems+1,1])
-        plt.text(0.5,-0,"N : " + str(self.N),fontsize=11,ha="center",va="bottom", color=text_color)
-        plt.text(0.5,-1,"N_seg : " + str(self.N_seg),fontsize=11,ha="center",va="bottom", color=text_color)
-        plt.text(0.5,-2,"a : " + str(self.a),fontsize=11,ha="center",va="bottom", color=text_color)
-        plt.text(0.5,-3,"p: " + str(self._period)+" nm",fontsize=11,ha="center",va="bottom", color=text_color)
-        plt.text(0.5,-4,"w1 : " + str(self._w1)+" nm",fontsize=11,ha="center",va="bottom", color=text_color)
-        plt.text(0.5,-5,"w2 : " + str(self._w2)+" nm",fontsize=11,ha="center",va="bottom", color=text_color)
+        artists["specs"] = plt.text(0.5,-numElems+1, self._specifications(), fontsize=11, ha="center", va="bottom",
+                                    ma="center", linespacing=1.45, color=text_color)
         plt.xticks([])
         plt.yticks([])
         plt.box(False)
@@ -664,17 +738,20 @@ class ContraDC():
         plt.title("Performance", color=text_color)
         numElems = len(self.performance)
         plt.axis([0,1,-numElems+1,1])
-        for i, item  in zip(range(len(self.performance)), self.performance):
-            plt.text(0.5,-i, item +" : ", fontsize=11, ha="right", va="bottom", color=text_color)
-            plt.text(0.5,-i, str(self.performance[item][0])+" "+self.performance[item][1], fontsize=11, ha="left", va="bottom", color=text_color)
+        # one label and one value column, instead of two texts per item
+        labels, values = self._performanceColumns()
+        plt.text(0.5,-numElems+1, labels, fontsize=11, ha="right", va="bottom", ma="right", linespacing=1.75, color=text_color)
+        artists["values"] = plt.text(0.5,-numElems+1, values, fontsize=11, ha="left", va="bottom", ma="left",
+                                     linespacing=1.75, color=text_color)
         plt.xticks([])
         plt.yticks([])
         plt.box(False)
 
         
         plt.subplot(grid[2:,1:])
-        plt.plot(self.wavelength*1e9, self.thru, label="Thru port")
-        plt.plot(self.wavelength*1e9, self.drop, label="Drop port")
+        stride = self._plotStride()
+        artists["thru"], = plt.plot(self._wavelength[::stride], self.thru[::stride], label="Thru port")
+        artists["drop"], = plt.plot(self._wavelength[::stride], self.drop[::stride], label="Drop port")
         plt.legend(loc="best", frameon=False)
         plt.xlabel("Wavelength (nm)", color=text_color)
         plt.ylabel("Response (dB)", color=text_color)
@@ -683,21 +760,73 @@ class ContraDC():
         plt.yticks(color=text_color)
         plt.xticks(color=text_color)
         # plt.tick_params(axis='x', top=True)
-        plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
+        plt.grid(True, color='w', linestyle='-', linewidth=1.5)
         plt.tick_params(axis=u'both', which=u'both',length=0)
 
         if tag_url:
             url = "https://github.com/JonathanCauchon/Contra-DC"
-            plt.text(self._wavelength.min(), min(self.drop.min(), self.thru.min()), url, va="top", color="grey", size=6)
+            artists["url"] = plt.text(self._wavelength.min(), min(self.drop.min(), self.thru.min()), url,
+                                      va="top", color="grey", size=6)
 
         plt.show()
 
         return self
 
-    def plot_format(self):
+    def _plotStride(self):
+        """Decimation of the spectrum plot, about the resolution of the screen."""
+        return max(1, self.resolution//4000)
+
+    def _specifications(self):
+        """Text of the specifications panel, one line per item."""
+        return "\n".join(["N : " + str(self.N),
+                          "N_seg : " + str(self.N_seg),
+                          "a : " + str(self.a),
+                          "p: " + str(self._period)+" nm",
+                          "w1 : " + str(self._w1)+" nm",
+                          "w2 : " + str(self._w2)+" nm"])
+
+    def _performanceColumns(self):
+        """Label and value columns of the performance panel."""
+        labels = "\n".join(item + " : " for item in self.performance)
+        values = "\n".join(str(value[0]) + " " + value[1] for value in self.performance.values())
+        return labels, values
+
+    def _updateResults(self):
+        """Updates the data of the figure drawn by a previous displayResults() call,
+        without re-creating its axes and artists.
+        """
 
-        plt.style.use('ggplot')
-        plt.rcParams['axes.prop_cycle'] = cycler('color', ['blue', 'red', 'black', 'green', 'brown', 'orangered', 'purple'])
-        plt.grid(b=True, color='w', linestyle='-', linewidth=1.5)
-        plt.tick_params(axis=u'both', which=u'both',length=0)
-        plt.legend(frameon=False)
+        artists = self._artists
+        segments = np.arange(self.N_seg)
+        profiles = {"apod": self._apod_profile, "period": self._period_profile}
+        if self.polyfit_file is None:
+            profiles.update(w2=self._w2_profile, w1=self._w1_profile, T=self.T_profile)
+        for key, profile in profiles.items():
+            artists[key].set_data(segments, profile)
+
+        artists["specs"].set_text(self._specifications())
+        artists["values"].set_text(self._performanceColumns()[1])
+
+        stride = self._plotStride()
+        artists["thru"].set_data(self._wavelength[::stride], self.thru[::stride])
+        artists["drop"].set_data(self._wavelength[::stride], self.drop[::stride])
+        if "url" in artists:
+            artists["url"].set_position((self._wavelength.min(), min(self.drop.min(), self.thru.min())))
+
+        for key in list(profiles) + ["thru"]:
+            ax = artists[key].axes
+            ax.relim()
+            ax.autoscale_view()
+
+    def plot_format(self, ax=None):
+        """Formats the grid, ticks and legend of a plot like those of displayResults().
+        The style itself is set once, when the module is imported.
+
+        :param ax: Axes to format, defaults to the current axes.
+        :type ax: matplotlib Axes
+        """
+
+        ax = ax or plt.gca()
+        ax.grid(True, color='w', linestyle='-', linewidth=1.5)
+        ax.tick_params(axis='both', which='both', length=0)
+        ax.legend(frameon=False)
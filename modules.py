@@ -1,5 +1,6 @@
 import cmath, math
 import sys, os, time
+import functools
 import numpy as np
 import scipy.linalg
 import scipy.interpolate
@@ -10,3 +11,20 @@ import warnings
 import copy
 import matplotlib.pyplot as plt 
 from cycler import cycler
+
+# optional JIT compilation of the propagation kernel
+try:
+    from numba import njit, prange
+    numba_available = True
+except ImportError:
+    numba_available = False
+    def njit(*args, **kwargs):
+        return lambda f: f
+    prange = range
+
+# optional GPU propagation
+try:
+    import cupy as cp
+    cupy_available = True
+except ImportError:
+    cupy_available = False
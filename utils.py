@@ -15,111 +15,297 @@ def clc():
     print ("\n"*10)
 
 
+"""
+    Supermode indices database
+"""
+
+def _read_neff(name):
+    """ Reads a file of the SOI database through its binary (.npy) copy,
+    which is (re)written whenever the textual source is newer.
+    """
+    path = r"./Database/neff/" + name
+    if os.path.exists(path + ".npy") and os.path.getmtime(path + ".npy") >= os.path.getmtime(path + ".txt"):
+        return np.load(path + ".npy")
+
+    data = np.loadtxt(path + ".txt")
+    try:
+        np.save(path + ".npy", data)
+    except OSError:
+        pass # read-only database, the text file is read every time
+    return data
+
+
+@functools.lru_cache(maxsize=1)
+def load_neff():
+    """ Supermode indices n1, n2 (5,5,5) of the SOI database on their
+    (w1, w2, wavelength) axes, read once per process.
+    """
+    n1 = np.reshape(_read_neff("neff_1"),(5,5,5))
+    n2 = np.reshape(_read_neff("neff_2"),(5,5,5))
+    w1_w2_wvl = _read_neff("w1_w2_lambda")
+
+    return n1, n2, w1_w2_wvl
+
+
+@functools.lru_cache(maxsize=1)
+def neff_interpolators():
+    """ Interpolators of the supermode indices in (w1, w2, wavelength),
+    built from the SOI database once per process.
+    """
+    n1, n2, w1_w2_wvl = load_neff()
+
+    f1 = scipy.interpolate.RegularGridInterpolator(tuple(w1_w2_wvl), n1)
+    f2 = scipy.interpolate.RegularGridInterpolator(tuple(w1_w2_wvl), n2)
+
+    return f1, f2
+
+
+@functools.lru_cache(maxsize=2)
+def _interpolate_neff(w1_profile, w2_profile, wavelength):
+    f1, f2 = neff_interpolators()
+
+    # evaluate both supermode grids on every (wavelength, segment) pair at once
+    w1_profile, w2_profile, wavelength = (np.frombuffer(x) for x in (w1_profile, w2_profile, wavelength))
+    pts = np.stack(np.broadcast_arrays(w1_profile[None,:], w2_profile[None,:], wavelength[:,None]), axis=-1)
+    n1 = f1(pts.reshape(-1,3)).reshape(pts.shape[:-1])
+    n2 = f2(pts.reshape(-1,3)).reshape(pts.shape[:-1])
+
+    # shared between simulations, hence read-only
+    n1.flags.writeable = False
+    n2.flags.writeable = False
+    return n1, n2
+
+
+def interpolate_neff(w1_profile, w2_profile, wavelength):
+    """ Supermode indices n1, n2 (resolution, N_seg) of the SOI database, at room
+    temperature, for the given width profiles (N_seg) and wavelengths (resolution).
+    The last two results are kept in memory, so that repeated simulations of
+    a geometry skip the interpolation.
+    """
+    # each array is its own key, so no two (segments, wavelengths) splits can collide
+    return _interpolate_neff(*(np.ascontiguousarray(x, dtype=float).tobytes() for x in
+                               (w1_profile, w2_profile, wavelength)))
+
+
+@functools.lru_cache(maxsize=1)
+def target_wavelengths():
+    """ Reflection wavelengths and their (period, w1, w2) combinations,
+    loaded from the SOI database once per process.
+    """
+    return tuple(np.transpose(np.loadtxt(r"./Database/Target_wavelengths.txt")))
+
+
 """
     Linear algebra
 """
 
 def switchTop(P):
-    if P.ndim == 3:
-        FF = P[:,:2,:2]
-        FG = P[:,:2,2:]
-        GF = P[:,2:,:2]
-        GG = P[:,2:,2:]
-        GG_ = np.linalg.inv(GG)
+    """ Switches the left-right transfer matrices P (..., 4, 4) to in-out form.
+    The (..., 2, 2) GG block is inverted once, in a single batched call.
+    """
+    FF = P[...,:2,:2]
+    FG = P[...,:2,2:]
+    GF = P[...,2:,:2]
+    GG = P[...,2:,2:]
+    GG_ = np.linalg.inv(GG)
 
-        H = np.zeros(P.shape, dtype=complex)
+    H = np.zeros_like(P, dtype=complex)
 
-        H[:,:2,:2] = FF - np.matmul(FG, np.matmul(GG_, GF))
-        H[:,:2,2:] = np.matmul(FG,GG_)
-        H[:,2:,:2] = np.matmul(-GG_,GF)
-        H[:,2:,2:] = GG_
+    H[...,2:,:2] = -np.matmul(GG_, GF)
+    H[...,:2,:2] = FF + np.matmul(FG, H[...,2:,:2])
+    H[...,:2,2:] = np.matmul(FG, GG_)
+    H[...,2:,2:] = GG_
 
-        return H
+    return H
 
-    elif P.ndim == 4:
-        FF = P[:,:,:2,:2]
-        FG = P[:,:,:2,2:]
-        GF = P[:,:,2:,:2]
-        GG = P[:,:,2:,2:]
-        GG_ = np.linalg.inv(GG)
 
-        H = np.zeros(P.shape, dtype=complex)
+def cascade(M):
+    """ Cascades the transfer matrices M (..., N_seg, 4, 4) along the segment axis,
+    i.e. returns M[...,N_seg-1,:,:] @ ... @ M[...,0,:,:]. Neighbouring segments are 
+    multiplied pairwise, so that only log2(N_seg) batched products are needed.
+    """
 
-        H[:,:,:2,:2] = FF - np.matmul(FG, np.matmul(GG_, GF))
-        H[:,:,:2,2:] = np.matmul(FG,GG_)
-        H[:,:,2:,:2] = np.matmul(-GG_,GF)
-        H[:,:,2:,2:] = GG_
+    while M.shape[-3] > 1:
+        n = M.shape[-3]//2*2
+        P = np.matmul(M[...,1:n:2,:,:], M[...,0:n:2,:,:])
+        if M.shape[-3] > n:
+            P = np.concatenate((P, M[...,n:,:,:]), axis=-3)
+        M = P
 
-        return H
+    return M[...,0,:,:]
 
 
-""" Matrix exponential
-source: https://github.com/geoopt/geoopt/blob/master/geoopt/linalg/_expm.py
+""" Closed-form exponential of the coupled-mode matrix
 
 """
 
 
-def pade13(A):
-    """ Computes Pade decomposition """
-
-    b = (64764752532480000., 
-        32382376266240000., 
-        7771770303897600.,
-        1187353796428800., 
-        129060195264000., 
-        10559470521600.,
-        670442572800., 
-        33522128640., 
-        1323241920., 
-        40840800., 
-        960960.,
-        16380., 
-        182., 
-        1.)
-
-    ident = np.eye(A.shape[-1], dtype=A.dtype)
-    A2 = np.matmul(A, A)
-    A4 = np.matmul(A2, A2)
-    A6 = np.matmul(A4, A2)
-    U = np.matmul(
-        A,
-        np.matmul(A6, b[13] * A6 + b[11] * A4 + b[9] * A2)
-        + b[7] * A6
-        + b[5] * A4
-        + b[3] * A2
-        + b[1] * ident )
-
-    V = ( np.matmul(A6, b[12] * A6 + b[10] * A4 + b[8] * A2)
-        + b[6] * A6
-        + b[4] * A4
-        + b[2] * A2
-        + b[0] * ident )
-
-    return U, V
-
-
-def matrix_2_power(x, p):
-    for _ in range(int(p)):
-        x = np.matmul(x,x)
-    return x
-
-
-def expm(A): 
-    A_fro = np.linalg.norm(A)
-
-    # Scaling step
-    n_squarings = np.clip(np.ceil(np.log(A_fro / 5.371920351148152) /0.6931471805599453), a_min=0, a_max=None)
-    # n_squarings = np.clip(np.ceil(np.log(A_fro / 5.371920351148152) /0.6931471805599453), a_min=0, a_max=None)
-    scaling = 2.0 ** n_squarings
-
-    A_scaled = A / scaling
-
-    # Pade 13 approximation
-    U, V = pade13(A_scaled)
-    P = U + V
-    Q = -U + V
-
-    R = np.linalg.solve(P, Q)  # solve P = Q*R
-    expmA = matrix_2_power(R, n_squarings)
-    return expmA
+def sinhc(x):
+    """ sinh(x)/x, well-behaved at x = 0 """
+    return np.sinc(1j*x/np.pi)
+
+
+def expm_coupled(U, L, l):
+    """ Computes exp(l*A) for A = [[0, U], [L, 0]], where U and L are
+    stacks (..., 2, 2) of coupling blocks and l is broadcastable to U[...,0,0].
+
+    A**2 is block-diagonal, so that exp(l*A) = [[C(UL), U*S(LU)], [L*S(UL), C(LU)]]
+    with C(X) = cosh(l*sqrt(X)) and S(X) = sinh(l*sqrt(X))/sqrt(X). Both are 
+    evaluated from the eigenvalues of the 2x2 blocks (UL and LU share them),
+    written as to remain stable for vanishing or degenerate coupling.
+    """
+
+    X = np.matmul(U, L)
+    Y = np.matmul(L, U)
+
+    # eigenvalues m +/- d of X (and Y)
+    m = (X[...,0,0] + X[...,1,1])/2
+    det = X[...,0,0]*X[...,1,1] - X[...,0,1]*X[...,1,0]
+    d = np.sqrt(m**2 - det)
+    s_p, s_m = np.sqrt(m + d), np.sqrt(m - d)
+    P, Q = l*(s_p + s_m)/2, l*(s_p - s_m)/2
+
+    # C(X) = a_C + b_C*(X - m), S(X) = a_S + b_S*(X - m)
+    a_C = np.cosh(P)*np.cosh(Q)
+    b_C = l**2/2 * sinhc(P)*sinhc(Q)
+    a_S = l/2 * (sinhc(P + Q) + sinhc(P - Q))
+
+    # b_S = l**3 * divided difference of sinhc(sqrt(t)) at (P+Q)**2, (P-Q)**2
+    a, b = (P + Q)**2, (P - Q)**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        G_sum = (sinhc(P + Q) - sinhc(P - Q))/(4*P*Q)
+        G_diff = (np.cosh(P)*sinhc(Q) - sinhc(P)*np.cosh(Q))/(2*(P**2 - Q**2))
+    G_series = 1/6 + (a + b)/120 + (a**2 + a*b + b**2)/5040 + (a + b)*(a**2 + b**2)/362880
+
+    G = np.where(2*np.abs(P*Q) >= np.abs(P**2 - Q**2), G_sum, G_diff)
+    G = np.where(np.abs(P)**2 + np.abs(Q)**2 < 1e-2, G_series, G)
+    b_S = l**3 * G
+
+    def f(a_, b_, Z):
+        F = b_[...,None,None]*Z
+        F[...,0,0] += a_ - b_*m
+        F[...,1,1] += a_ - b_*m
+        return F
+
+    # *_like allocations keep the arrays on the device of U (numpy or cupy)
+    E = np.zeros_like(U, shape=U.shape[:-2] + (4,4), dtype=complex)
+    E[...,:2,:2] = f(a_C, b_C, X)
+    E[...,:2,2:] = np.matmul(U, f(a_S, b_S, Y))
+    E[...,2:,:2] = np.matmul(L, f(a_S, b_S, X))
+    E[...,2:,2:] = f(a_C, b_C, Y)
+
+    return E
+
+
+
+""" JIT-compiled propagation (requires numba)
+Same closed-form exponential as expm_coupled, segment by segment and 
+wavelength by wavelength (in parallel), without the intermediate
+(resolution, N_seg, 4, 4) arrays.
+
+"""
+
 
+@njit("c16(c16)", cache=True, fastmath=True)
+def _sinhc(x):
+    if abs(x) < 1e-8:
+        return 1 + x*x/6
+    return cmath.sinh(x)/x
+
+
+@njit("c16(c16, c16)", cache=True, fastmath=True)
+def _divdiff_sinhc(P, Q):
+    """ Divided difference of sinhc(sqrt(t)) at (P+Q)**2, (P-Q)**2 """
+    if abs(P)**2 + abs(Q)**2 < 1e-2:
+        a, b = (P + Q)**2, (P - Q)**2
+        return 1/6 + (a + b)/120 + (a*a + a*b + b*b)/5040 + (a + b)*(a*a + b*b)/362880
+    if 2*abs(P*Q) >= abs(P*P - Q*Q):
+        return (_sinhc(P + Q) - _sinhc(P - Q))/(4*P*Q)
+    return (cmath.cosh(P)*_sinhc(Q) - _sinhc(P)*cmath.cosh(Q))/(2*(P*P - Q*Q))
+
+
+@njit("c16[:,:,::1](c16[:,::1], c16[:,::1], c16[::1], f8, f8[::1], f8[::1])",
+      cache=True, fastmath=True, parallel=True, nogil=True)
+def propagate_kernel(beta_del_1, beta_del_2, kappa, antiRef, l_seg, l_cum):
+    """ Left-right transfer matrices (resolution, 4, 4) of the cascaded segments,
+    given the detuned propagation constants beta_del_1, beta_del_2 (resolution, N_seg)
+    and the coupling, length and position of each segment (N_seg).
+    Compiled eagerly for C-contiguous complex128/float64 arrays.
+    """
+
+    resolution, N_seg = beta_del_1.shape
+    P = np.zeros((resolution, 4, 4), dtype=np.complex128)
+
+    # wavelengths are independent, and spread over all cores
+    for ii in prange(resolution):
+        U = np.empty((2,2), dtype=np.complex128)
+        L = np.empty((2,2), dtype=np.complex128)
+        X = np.empty((2,2), dtype=np.complex128)
+        Y = np.empty((2,2), dtype=np.complex128)
+        SX = np.empty((2,2), dtype=np.complex128)
+        SY = np.empty((2,2), dtype=np.complex128)
+        E = np.empty((4,4), dtype=np.complex128)
+        Pi = np.empty((4,4), dtype=np.complex128)
+        tmp = np.empty((4,4), dtype=np.complex128)
+
+        Pi[:,:] = 0
+        for k in range(4):
+            Pi[k,k] = 1
+
+        for n in range(N_seg):
+            b1, b2, l = beta_del_1[ii,n], beta_del_2[ii,n], l_seg[n]
+            k12 = kappa[n]
+            k11 = antiRef*kappa[n]
+            k22 = antiRef*kappa[n]
+
+            phase_11 = cmath.exp(1j*2*b1*l_cum[n])
+            phase_12 = cmath.exp(1j*(b1+b2)*l_cum[n])
+            phase_22 = cmath.exp(1j*2*b2*l_cum[n])
+
+            U[0,0] = -1j*k11*phase_11
+            U[0,1] = -1j*k12*phase_12
+            U[1,0] = U[0,1]
+            U[1,1] = -1j*k22*phase_22
+
+            L[0,0] = 1j*k11.conjugate()/phase_11
+            L[0,1] = 1j*k12.conjugate()/phase_12
+            L[1,0] = L[0,1]
+            L[1,1] = 1j*k22.conjugate()/phase_22
+
+            for r in range(2):
+                for c in range(2):
+                    X[r,c] = U[r,0]*L[0,c] + U[r,1]*L[1,c]
+                    Y[r,c] = L[r,0]*U[0,c] + L[r,1]*U[1,c]
+
+            m = (X[0,0] + X[1,1])/2
+            d = cmath.sqrt(m*m - (X[0,0]*X[1,1] - X[0,1]*X[1,0]))
+            s_p, s_m = cmath.sqrt(m + d), cmath.sqrt(m - d)
+            p, q = l*(s_p + s_m)/2, l*(s_p - s_m)/2
+
+            a_C = cmath.cosh(p)*cmath.cosh(q)
+            b_C = l**2/2 * _sinhc(p)*_sinhc(q)
+            a_S = l/2 * (_sinhc(p + q) + _sinhc(p - q))
+            b_S = l**3 * _divdiff_sinhc(p, q)
+
+            for r in range(2):
+                for c in range(2):
+                    delta = 1.0 if r == c else 0.0
+                    E[r,c] = a_C*delta + b_C*(X[r,c] - m*delta)
+                    E[r+2,c+2] = a_C*delta + b_C*(Y[r,c] - m*delta)
+                    SX[r,c] = a_S*delta + b_S*(X[r,c] - m*delta)
+                    SY[r,c] = a_S*delta + b_S*(Y[r,c] - m*delta)
+
+            for r in range(2):
+                for c in range(2):
+                    E[r,c+2] = U[r,0]*SY[0,c] + U[r,1]*SY[1,c]
+                    E[r+2,c] = L[r,0]*SX[0,c] + L[r,1]*SX[1,c]
+
+            # propagate the sucker
+            for r in range(4):
+                for c in range(4):
+                    tmp[r,c] = E[r,0]*Pi[0,c] + E[r,1]*Pi[1,c] + E[r,2]*Pi[2,c] + E[r,3]*Pi[3,c]
+            Pi[:,:] = tmp
+
+        P[ii] = Pi
+
+    return P